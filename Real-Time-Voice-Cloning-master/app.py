@@ -5,12 +5,33 @@ Allows users to record a voice sample and synthesize speech.
 
 import os
 import io
+import queue
+import secrets
+import struct
+import threading
+import time
 from pathlib import Path
 import numpy as np
 from flask import Flask, render_template, request, jsonify, send_file
 import torch
 import soundfile as sf
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import torchaudio
+except ImportError:
+    torchaudio = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    from pedalboard import time_stretch as rubberband_time_stretch
+except ImportError:
+    rubberband_time_stretch = None
 
 from encoder import inference as encoder
 from encoder.params_model import model_embedding_size as speaker_embedding_size
@@ -20,6 +41,13 @@ from utils.default_models import ensure_default_models
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50 MB max file size
+# Run the vocoder under fp16 autocast when on GPU. Set VOCODER_FP16=0 to disable.
+app.config['VOCODER_FP16'] = os.environ.get('VOCODER_FP16', '1') != '0'
+# Replace the vocoder's upsampling network with a TorchScript trace. Set VOCODER_JIT=0 to disable.
+app.config['VOCODER_JIT'] = os.environ.get('VOCODER_JIT', '1') != '0'
+# Quantize the vocoder's linear layers to int8 when running on CPU. Faster, but slightly lowers
+# the audio quality, so it is opt-in with VOCODER_INT8=1.
+app.config['VOCODER_INT8'] = os.environ.get('VOCODER_INT8', '0') == '1'
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,26 +56,405 @@ logger = logging.getLogger(__name__)
 encoder_model = None
 synthesizer_model = None
 vocoder_model = None
+_load_lock = threading.Lock()
+
+# Polyphase resamplers keyed by input sample rate. Building the sinc kernel is the expensive
+# part, so each one is created once and reused for every recording at that rate.
+_resamplers = {}
+
+# Speaker embeddings computed by /api/record, keyed by the token handed back to the client so
+# that /api/synthesize doesn't need the embedding to be sent back as JSON.
+EMBED_CACHE_TTL = 60 * 60  # In seconds
+_embed_cache = {}  # token -> (expiry time, embedding)
+_embed_cache_lock = threading.Lock()
+
+# Concurrent synthesis requests are coalesced into a single Tacotron batch. The worker waits at
+# most SYNTH_BATCH_WAIT after the first request for others to join, up to the synthesizer's
+# batch size.
+SYNTH_BATCH_WAIT = 0.02  # In seconds
+_synth_queue = queue.Queue()  # (text, embedding, future)
+_synth_worker_pid = None
+_synth_worker_lock = threading.Lock()
+
+# The blocking model work of a request runs on this pool, which caps how many requests use the
+# models at once independently of how many server threads accept and send requests. Requests
+# can only be batched together by the synthesizer if they are on the pool at the same time. On
+# the CPU the pool threads split the cores between them (see load_models()), so the default
+# there is a few threads with several cores each rather than one single-core thread per core.
+if torch.cuda.is_available():
+    _default_inference_workers = os.cpu_count() or 4
+else:
+    _default_inference_workers = min(4, os.cpu_count() or 1)
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', _default_inference_workers))
+_inference_pool = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+# Per-thread buffers the WAV responses are encoded into, grown only when an output doesn't fit.
+# Encoding happens on the inference pool, whose threads persist across requests.
+WAV_BUFFER_SIZE = 16 * 1024 * 1024  # In bytes
+_wav_buffer = threading.local()
 
 
 def load_models():
     """Load all models into memory."""
     global encoder_model, synthesizer_model, vocoder_model
     
-    if encoder_model is None:
+    with _load_lock:
+        if encoder_model is not None:
+            return
+        
         logger.info("Loading models...")
+        # Nothing in the app trains. Grad mode is per thread, so the model calls made from
+        # request and worker threads are also wrapped in inference_mode() or no_grad().
+        torch.set_grad_enabled(False)
+        if torch.cuda.is_available():
+            # Allow TF32 tensor cores for the matmuls and convolutions. cuDNN benchmark mode is
+            # left off: the convolutions (Tacotron's CBHG and postnet, the vocoder's upsampling
+            # network) see a different spectrogram length on every request, so it would autotune
+            # again for nearly every request.
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+        else:
+            # Split the cores between the inference pool threads, which all run the models at
+            # the same time, so that they don't oversubscribe the CPU
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS))
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError as e:
+                logger.warning(f"Could not set the number of interop threads: {str(e)}")
         ensure_default_models(Path("saved_models"))
         
         encoder.load_model(Path("saved_models/default/encoder.pt"))
-        encoder_model = True
-        
         synthesizer_model = Synthesizer(Path("saved_models/default/synthesizer.pt"), verbose=False)
+        synthesizer_model.load()
         vocoder.load_model(Path("saved_models/default/vocoder.pt"), verbose=False)
+        if app.config['VOCODER_INT8'] and not torch.cuda.is_available():
+            vocoder.quantize_model()
+        if app.config['VOCODER_JIT']:
+            try:
+                vocoder.trace_model()
+            except Exception as e:
+                logger.warning(f"Failed to trace vocoder, running it in eager mode: {str(e)}")
+        warmup_models()
+        
+        encoder_model = True
         vocoder_model = True
         
         logger.info("Models loaded successfully")
 
 
+def warmup_models():
+    """
+    Runs every model once on a tiny input, so that lazy initialization and the CUDA/cuDNN
+    caches are done before the first real request. The numba kernels are compiled here too.
+    Errors are not caught: a model that fails here would fail every request, so load_models()
+    fails too and the models are not marked as loaded.
+    """
+    logger.info("Warming up models...")
+    wav = np.random.uniform(-0.5, 0.5, encoder.sampling_rate).astype(np.float32)
+    embed = encoder.embed_utterance(wav)
+    spec = synthesizer_model.synthesize_spectrograms(["Hello."], [embed])[0]
+    vocode(spec)
+    peak_normalize(np.linspace(-0.5, 0.5, 16, dtype=np.float32))
+
+
+def resample_to_encoder_rate(wav, sr):
+    """
+    Resamples a mono waveform to the encoder sampling rate. Uses torchaudio's cached polyphase
+    resampler when available, and falls back to librosa otherwise.
+    """
+    wav = np.ascontiguousarray(wav, dtype=np.float32)
+    if torchaudio is not None:
+        try:
+            resampler = _resamplers.get(sr)
+            if resampler is None:
+                resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=encoder.sampling_rate)
+                _resamplers[sr] = resampler
+            with torch.no_grad():
+                return resampler(torch.from_numpy(wav).unsqueeze(0)).squeeze(0).numpy()
+        except Exception as ta_err:
+            logger.warning(f"torchaudio resampling failed: {ta_err}, trying librosa...")
+
+    import librosa
+    return librosa.resample(wav, orig_sr=sr, target_sr=encoder.sampling_rate)
+
+
+def read_pcm16_wav(audio_data):
+    """
+    Decodes a 16-bit PCM WAV file straight from its bytes, which is what the web UI uploads.
+
+    :param audio_data: the raw bytes of the uploaded file
+    :return: the mono waveform as a numpy array of float32 and its sample rate, or None if the
+    data isn't a 16-bit PCM WAV file (the caller should then use a full decoder).
+    """
+    if len(audio_data) < 12 or audio_data[:4] != b"RIFF" or audio_data[8:12] != b"WAVE":
+        return None
+
+    # Walk the RIFF chunks to find the format description and the samples
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(audio_data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", audio_data, offset)
+        body = offset + 8
+        if chunk_id == b"fmt " and chunk_size >= 16 and body + 16 <= len(audio_data):
+            fmt = struct.unpack_from("<HHIIHH", audio_data, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            format_tag, channels, sr, _, _, bits_per_sample = fmt
+            if format_tag != 1 or bits_per_sample != 16 or channels == 0:
+                return None
+            data_size = min(chunk_size, len(audio_data) - body)
+            count = data_size // (2 * channels) * channels
+            wav = np.frombuffer(audio_data, dtype="<i2", count=count, offset=body).astype(np.float32)
+            wav *= 1 / 32768
+            if channels > 1:
+                wav = wav.reshape(-1, channels).mean(axis=1)
+            return wav, sr
+        # Chunks are padded to an even size
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _peak_normalize_inplace(x, target):
+        m = np.float32(0)
+        for i in numba.prange(x.size):
+            m = max(m, abs(x[i]))
+        if m == 0:
+            return
+        scale = np.float32(target / m)
+        for i in numba.prange(x.size):
+            x[i] *= scale
+else:
+    _peak_normalize_inplace = None
+
+
+def write_pcm16_wav(wav, sr):
+    """
+    Encodes a mono waveform as a 16-bit PCM WAV file into this thread's reusable buffer.
+
+    :param wav: the waveform as a numpy array of float32 in [-1, 1]
+    :param sr: the sample rate of the waveform
+    :return: a memoryview on the encoded file. It is only valid until this thread encodes
+    another file.
+    """
+    data_size = len(wav) * 2
+    n_bytes = 44 + data_size
+    buf = getattr(_wav_buffer, "buf", None)
+    if buf is None or len(buf) < n_bytes:
+        buf = bytearray(max(WAV_BUFFER_SIZE, n_bytes))
+        _wav_buffer.buf = buf
+
+    struct.pack_into("<4sI4s4sIHHIIHH4sI", buf, 0, b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16,
+                     1, 1, sr, sr * 2, 2, 16, b"data", data_size)
+    samples = np.frombuffer(buf, dtype="<i2", count=len(wav), offset=44)
+    # Round to the nearest level rather than truncating toward zero, which would bias the signal.
+    # The float temporary is only as large as this waveform and is freed on return.
+    scaled = np.multiply(wav, 32767, dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.copyto(samples, scaled, casting="unsafe")
+    return memoryview(buf)[:n_bytes]
+
+
+def peak_normalize(wav, target=0.99):
+    """
+    Scales a waveform so that its peak amplitude is <target>. The peak is computed once and the
+    scaling is fused with the cast to float32, in place when the input already is float32.
+    """
+    if (_peak_normalize_inplace is not None and wav.dtype == np.float32 and wav.ndim == 1 and
+            wav.flags.c_contiguous and wav.flags.writeable):
+        _peak_normalize_inplace(wav, target)
+        return wav
+
+    peak = np.abs(wav).max() if wav.size else 0
+    if peak == 0:
+        return wav.astype(np.float32, copy=False)
+    out = wav if wav.dtype == np.float32 else None
+    return np.multiply(wav, np.float32(target / peak), out=out, dtype=np.float32)
+
+
+def store_embedding(embed):
+    """Caches a speaker embedding and returns the token to retrieve it with."""
+    token = secrets.token_urlsafe(16)
+    now = time.monotonic()
+    with _embed_cache_lock:
+        # Sweep expired entries so the cache doesn't grow without bound
+        expired = [t for t, (expiry, _) in _embed_cache.items() if expiry <= now]
+        for t in expired:
+            del _embed_cache[t]
+        _embed_cache[token] = (now + EMBED_CACHE_TTL, embed.astype(np.float32))
+    return token
+
+
+def fetch_embedding(token):
+    """Returns the cached speaker embedding for a token, or None if unknown or expired."""
+    with _embed_cache_lock:
+        entry = _embed_cache.get(token)
+        if entry is None:
+            return None
+        expiry, embed = entry
+        if expiry <= time.monotonic():
+            del _embed_cache[token]
+            return None
+        return embed
+
+
+def _synthesis_worker():
+    """Drains the synthesis queue, running one synthesizer forward pass per batch of requests."""
+    max_batch = Synthesizer.hparams.synthesis_batch_size
+    while True:
+        batch = [_synth_queue.get()]
+        deadline = time.monotonic() + SYNTH_BATCH_WAIT
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_synth_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        texts, embeds, futures = zip(*batch)
+        if len(batch) > 1:
+            logger.info(f"Synthesizing batch of {len(batch)} requests")
+        try:
+            specs = _synthesize_batch(texts, embeds)
+        except Exception as e:
+            if len(batch) == 1:
+                futures[0].set_exception(e)
+                continue
+            # Retry the requests one at a time, so that one bad request doesn't fail the others
+            logger.warning(f"Batched synthesis failed: {str(e)}, retrying requests one by one")
+            for text, embed, future in batch:
+                try:
+                    future.set_result(_synthesize_batch([text], [embed])[0])
+                except Exception as item_err:
+                    future.set_exception(item_err)
+            continue
+        for future, spec in zip(futures, specs):
+            future.set_result(spec)
+
+
+def _synthesize_batch(texts, embeds):
+    # Spectrograms stay on the synthesizer's device for the vocoder
+    with torch.inference_mode():
+        return synthesizer_model.synthesize_spectrograms(list(texts), list(embeds),
+                                                         return_tensors=True)
+
+
+def _ensure_synthesis_worker():
+    """
+    Starts the batching worker in the current process on first use. Threads don't survive a
+    fork, so it is tracked by pid, and a process forked after the app was imported starts its own.
+    """
+    global _synth_worker_pid
+    with _synth_worker_lock:
+        if _synth_worker_pid != os.getpid():
+            threading.Thread(target=_synthesis_worker, name="synthesis-batcher", daemon=True).start()
+            _synth_worker_pid = os.getpid()
+
+
+def synthesize_spectrogram(text, embed):
+    """Queues a text for batched synthesis and blocks until its mel spectrogram is ready."""
+    _ensure_synthesis_worker()
+    future = Future()
+    _synth_queue.put((text, embed, future))
+    return future.result()
+
+
+def vocode(spec):
+    """Generates the waveform for a mel spectrogram, using fp16 autocast on GPU if enabled."""
+    # WaveRNN.generate() builds new GRU cells on every call, whose parameters would become
+    # inference tensors under inference_mode() and break the GRU, so only no_grad() is used here
+    if app.config['VOCODER_FP16'] and torch.cuda.is_available():
+        with torch.no_grad(), torch.autocast("cuda", dtype=torch.float16):
+            wav = vocoder.infer_waveform(spec, normalize=True, batched=True)
+    else:
+        with torch.no_grad():
+            wav = vocoder.infer_waveform(spec, normalize=True, batched=True)
+    return np.asarray(wav, dtype=np.float32)
+
+
+def synthesize_waveform(text, embed, speed=1.0):
+    """
+    Synthesizes speech for a text in the voice of a speaker embedding.
+
+    :param text: the text to synthesize
+    :param embed: the speaker embedding as a numpy array of float32
+    :param speed: time-stretch rate, <1.0 slows down and >1.0 speeds up without changing pitch
+    :return: the waveform as a numpy array of float32 at the synthesizer sample rate
+    """
+    logger.info(f"Synthesizing: '{text}'")
+
+    # Synthesize mel spectrogram, batched with any concurrent requests
+    spec = synthesize_spectrogram(text, embed)
+
+    # Generate waveform
+    logger.info("Generating waveform...")
+    wav = vocode(spec)
+
+    # Postprocess (pad a bit to avoid cutoff). The vocoder output is already at the
+    # synthesizer rate and faded out, so it doesn't go through the encoder preprocessing and
+    # 100 ms of trailing silence is enough.
+    wav = np.pad(wav, (0, int(0.1 * synthesizer_model.sample_rate)), mode="constant")
+
+    # Normalize
+    wav = peak_normalize(wav)
+
+    # Apply time-stretching if requested (slows/speeds without changing pitch)
+    if abs(speed - 1.0) > 1e-6:
+        try:
+            logger.info(f"Applying time-stretch: rate={speed}")
+            # Both stretchers expect mono audio
+            # Our outputs are mono, but if not, convert to mono
+            if wav.ndim > 1:
+                wav_mono = np.mean(wav, axis=1)
+            else:
+                wav_mono = wav
+            wav_mono = wav_mono.astype(np.float32, copy=False)
+
+            # Prefer Rubberband (through pedalboard), it is faster and keeps speech transients
+            stretched = None
+            if rubberband_time_stretch is not None:
+                try:
+                    stretched = rubberband_time_stretch(
+                        wav_mono[np.newaxis, :],
+                        samplerate=synthesizer_model.sample_rate,
+                        stretch_factor=speed,
+                        high_quality=True,
+                        transient_mode="crisp"
+                    )[0]
+                except Exception as rb_err:
+                    logger.warning(f"Rubberband time-stretch failed: {rb_err}, trying librosa...")
+            if stretched is None:
+                import librosa
+                stretched = librosa.effects.time_stretch(wav_mono, rate=speed)
+
+            # After stretching, ensure amplitude normalization again
+            wav = peak_normalize(stretched)
+        except Exception as ts_err:
+            logger.warning(f"Time-stretch failed or librosa missing: {ts_err}. Skipping speed change.")
+
+    return wav
+
+
+def synthesize_wav_file(text, embed, speed=1.0):
+    """
+    Synthesizes speech like synthesize_waveform() and encodes it as a 16-bit PCM WAV file. Meant
+    to run on the inference pool, so that the encoding buffer of its thread gets reused.
+
+    :return: the WAV file as an in-memory file object
+    """
+    wav = synthesize_waveform(text, embed, speed)
+
+    # The waveform is float32 in [-0.99, 0.99] at this point, so it is quantized to 16-bit PCM,
+    # halving the response size. The file is copied out of the thread's buffer before the
+    # thread moves on to another request.
+    wav = np.asarray(wav, dtype=np.float32)
+    return io.BytesIO(write_pcm16_wav(wav, synthesizer_model.sample_rate))
+
+
 @app.route('/')
 def index():
     """Serve the main UI page."""
@@ -72,42 +479,49 @@ def handle_record():
         audio_data = audio_file.read()
         logger.info(f"Received audio file: {audio_file.filename}, size: {len(audio_data)} bytes")
         
-        # Load audio using soundfile
-        try:
-            audio_bytes = io.BytesIO(audio_data)
-            wav, sr = sf.read(audio_bytes)
-        except Exception as sf_err:
-            logger.warning(f"Soundfile failed: {sf_err}, trying librosa...")
-            import librosa
-            audio_bytes = io.BytesIO(audio_data)
-            wav, sr = librosa.load(audio_bytes, sr=None)
+        # Read 16-bit PCM WAV directly, otherwise load audio using soundfile
+        decoded = read_pcm16_wav(audio_data)
+        if decoded is not None:
+            wav, sr = decoded
+        else:
+            try:
+                audio_bytes = io.BytesIO(audio_data)
+                wav, sr = sf.read(audio_bytes)
+            except Exception as sf_err:
+                logger.warning(f"Soundfile failed: {sf_err}, trying librosa...")
+                import librosa
+                audio_bytes = io.BytesIO(audio_data)
+                wav, sr = librosa.load(audio_bytes, sr=None)
         
         logger.info(f"Loaded audio: sr={sr}, length={len(wav)} samples, duration={len(wav)/sr:.2f}s")
         
         # Resample to encoder sample rate if needed
         if sr != encoder.sampling_rate:
-            import librosa
             logger.info(f"Resampling from {sr} to {encoder.sampling_rate}")
-            wav = librosa.resample(wav, orig_sr=sr, target_sr=encoder.sampling_rate)
+            wav = resample_to_encoder_rate(wav, sr)
         
-        # Ensure audio is float32 and in valid range
-        wav = wav.astype(np.float32)
-        if np.max(np.abs(wav)) > 0:
-            wav = wav / np.max(np.abs(wav))
+        # Ensure audio is float32 and in valid range. preprocess_wav normalizes the volume
+        # itself, so only audio that would clip needs to be scaled here.
+        wav = np.asarray(wav, dtype=np.float32)
+        peak = float(np.abs(wav).max()) if wav.size else 0.0
+        if peak > 1.0:
+            wav = wav * (1.0 / peak)
         
         # Preprocess and embed
         logger.info(f"Processing recording ({len(wav)} samples)")
         preprocessed = encoder.preprocess_wav(wav)
         logger.info(f"Preprocessed: {len(preprocessed)} samples")
-        embed = encoder.embed_utterance(preprocessed)
+        with torch.inference_mode():
+            embed = encoder.embed_utterance(preprocessed)
         logger.info(f"Embedding created: shape={embed.shape}")
         
-        # Store embedding in session or return it for next request
+        # Keep the embedding server-side and hand the client a token for the next request
+        token = store_embedding(embed)
         return jsonify({
             "success": True,
             "message": "Voice recorded and processed successfully",
             "embedding_shape": list(embed.shape),
-            "embedding": embed.tolist()  # Convert to list for JSON
+            "token": token
         }), 200
     
     except Exception as e:
@@ -123,67 +537,36 @@ def handle_synthesize():
     try:
         data = request.get_json()
         text = data.get('text', '').strip()
+        embedding_token = data.get('embedding_token', None)
         embedding_list = data.get('embedding', None)
         
         if not text:
             return jsonify({"error": "Text is required"}), 400
         
-        if embedding_list is None:
+        if embedding_token is not None:
+            if not isinstance(embedding_token, str):
+                return jsonify({"error": "Speaker embedding token must be a string"}), 400
+            embed = fetch_embedding(embedding_token)
+            if embed is None:
+                return jsonify({"error": "Speaker embedding expired, please record again"}), 400
+        elif embedding_list is not None:
+            # Older clients send the embedding itself as a list of floats
+            try:
+                embed = np.array(embedding_list, dtype=np.float32)
+            except (TypeError, ValueError):
+                embed = None
+            if embed is None or embed.shape != (speaker_embedding_size,):
+                return jsonify({"error": f"Speaker embedding must be a list of "
+                                         f"{speaker_embedding_size} floats"}), 400
+        else:
             return jsonify({"error": "Speaker embedding is required"}), 400
-        
-        # Convert embedding back to numpy array
-        embed = np.array(embedding_list, dtype=np.float32)
 
         # Optional speed parameter: <1.0 slows down, >1.0 speeds up
         # Default 1.0 (no change)
         speed = float(data.get('speed', 1.0))
         
-        logger.info(f"Synthesizing: '{text}'")
-        
-        # Synthesize mel spectrogram
-        texts = [text]
-        embeds = [embed]
-        specs = synthesizer_model.synthesize_spectrograms(texts, embeds)
-        spec = specs[0]
-        
-        # Generate waveform
-        logger.info("Generating waveform...")
-        wav = vocoder.infer_waveform(spec, normalize=True, batched=True)
-        
-        # Postprocess (pad a bit to avoid cutoff)
-        wav = np.pad(wav, (0, synthesizer_model.sample_rate), mode="constant")
-        wav = encoder.preprocess_wav(wav)
-
-        # Normalize
-        wav = wav / np.max(np.abs(wav)) * 0.99 if np.max(np.abs(wav)) > 0 else wav
-
-        # Apply time-stretching if requested (slows/speeds without changing pitch)
-        if abs(speed - 1.0) > 1e-6:
-            try:
-                import librosa
-                logger.info(f"Applying time-stretch: rate={speed}")
-                # librosa.effects.time_stretch expects a 1-D numpy array (mono)
-                # Our outputs are mono, but if not, convert to mono
-                if wav.ndim > 1:
-                    wav_mono = np.mean(wav, axis=1)
-                else:
-                    wav_mono = wav
-
-                # librosa expects floats in (-inf, +inf) but normalized — keep current dtype
-                stretched = librosa.effects.time_stretch(wav_mono.astype(np.float32), rate=speed)
-
-                # After stretching, ensure amplitude normalization again
-                if np.max(np.abs(stretched)) > 0:
-                    stretched = stretched / np.max(np.abs(stretched)) * 0.99
-
-                wav = stretched.astype(np.float32)
-            except Exception as ts_err:
-                logger.warning(f"Time-stretch failed or librosa missing: {ts_err}. Skipping speed change.")
-        
-        # Convert to bytes
-        audio_bytes = io.BytesIO()
-        sf.write(audio_bytes, wav.astype(np.float32), synthesizer_model.sample_rate, format='WAV')
-        audio_bytes.seek(0)
+        # Run the models and the WAV encoding on the inference pool
+        audio_bytes = _inference_pool.submit(synthesize_wav_file, text, embed, speed).result()
         
         logger.info("Synthesis complete")
         
@@ -209,18 +592,8 @@ def health():
     }), 200
 
 
-@app.before_request
-def startup():
-    """Load models on first request."""
-    global encoder_model
-    if encoder_model is None:
-        try:
-            load_models()
-        except Exception as e:
-            logger.error(f"Failed to load models: {str(e)}")
-            return jsonify({"error": "Failed to load models"}), 500
-
-
 if __name__ == '__main__':
+    load_models()
     logger.info("Starting Voice Cloning UI server...")
-    app.run(debug=True, host='127.0.0.1', port=5000, threaded=True)
+    # Development server only, see wsgi.py for serving with gunicorn
+    app.run(host='127.0.0.1', port=5000, threaded=True)
@@ -107,7 +107,8 @@ def compute_partial_slices(n_samples, partial_utterance_n_frames=partials_n_fram
     return wav_slices, mel_slices
 
 
-def embed_utterance(wav, using_partials=True, return_partials=False, **kwargs):
+def embed_utterance(wav, using_partials=True, return_partials=False, partials_batch_size=32,
+                    **kwargs):
     """
     Computes an embedding for a single utterance.
 
@@ -119,6 +120,9 @@ def embed_utterance(wav, using_partials=True, return_partials=False, **kwargs):
     spectogram to the network.
     :param return_partials: if True, the partial embeddings will also be returned along with the
     wav slices that correspond to the partial embeddings.
+    :param partials_batch_size: the partial utterances are embedded in blocks of this many, so
+    that the memory used for the spectrogram and the model inputs doesn't grow with the length
+    of the utterance.
     :param kwargs: additional arguments to compute_partial_splits()
     :return: the embedding as a numpy array of float32 of shape (model_embedding_size,). If
     <return_partials> is True, the partial utterances as a numpy array of float32 of shape
@@ -140,17 +144,38 @@ def embed_utterance(wav, using_partials=True, return_partials=False, **kwargs):
     if max_wave_length >= len(wav):
         wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
 
-    # Split the utterance into partials
-    frames = audio.wav_to_mel_spectrogram(wav)
-    frames_batch = np.array([frames[s] for s in mel_slices])
-    partial_embeds = embed_frames_batch(frames_batch)
+    if _model is None:
+        raise Exception("Model was not loaded. Call load_model() before inference.")
 
-    # Compute the utterance embedding from the partial embeddings
-    raw_embed = np.mean(partial_embeds, axis=0)
-    embed = raw_embed / np.linalg.norm(raw_embed, 2)
+    # Embed the partials block by block. The spectrogram of each block is computed with a few
+    # frames of context on both sides, so that its frames are the same as those of the whole
+    # utterance's spectrogram. It is moved to the device once and the overlapping partials are
+    # sliced from it there, then embedded in a single forward pass.
+    samples_per_frame = int(sampling_rate * mel_window_step / 1000)
+    context_frames = int(np.ceil(mel_window_length / mel_window_step))
+    embed_sum = None
+    partial_embeds = []
+    with torch.no_grad():
+        for i in range(0, len(mel_slices), partials_batch_size):
+            block_slices = mel_slices[i:i + partials_batch_size]
+            start = max(block_slices[0].start - context_frames, 0)
+            stop = block_slices[-1].stop + context_frames
+            block_wav = wav[start * samples_per_frame:stop * samples_per_frame]
+            frames = torch.from_numpy(audio.wav_to_mel_spectrogram(block_wav)).to(_device)
+            frames_batch = torch.stack([frames[s.start - start:s.stop - start] for s in block_slices])
+            block_embeds = _model.forward(frames_batch)
+
+            block_sum = block_embeds.sum(dim=0)
+            embed_sum = block_sum if embed_sum is None else embed_sum + block_sum
+            if return_partials:
+                partial_embeds.append(block_embeds.cpu().numpy())
+
+        # Compute the utterance embedding from the partial embeddings
+        raw_embed = embed_sum / len(mel_slices)
+        embed = (raw_embed / torch.norm(raw_embed, 2)).cpu().numpy()
 
     if return_partials:
-        return embed, partial_embeds, wave_slices
+        return embed, np.concatenate(partial_embeds), wave_slices
     return embed
 
 
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for the web app, picked up automatically by `gunicorn wsgi:app`.
+"""
+
+bind = "127.0.0.1:5000"
+
+# The app must run in a single process. Speaker embeddings are cached in memory by the process
+# that served /api/record, and /api/synthesize has to reach the same process to find them.
+# Batching of concurrent synthesis requests also only happens within a process. Scale with
+# threads instead, which cover the IO-bound parts of a request (upload, decoding, sending the
+# WAV) while the model calls release the GIL inside torch. Running several workers would
+# require moving the embedding cache out of process first.
+workers = 1
+worker_class = "gthread"
+threads = 8
+
+# With a single worker there is nothing to share copy-on-write, so the worker loads the models
+# itself. This also keeps CUDA from ever being touched in the master, which would break CUDA in
+# the forked worker.
+preload_app = False
+
+# Synthesis on CPU can take minutes
+timeout = 600
@@ -7,7 +7,7 @@ let mediaRecorder;
 let audioChunks = [];
 let recordingStartTime;
 let timerInterval;
-let currentEmbedding = null;
+let currentEmbeddingToken = null;
 let synthesizedAudioBlob = null;
 let audioContext;
 let mediaStream;
@@ -137,7 +137,7 @@ function clearRecording() {
     recordBtn.disabled = false;
     clearBtn.disabled = true;
     useBtn.disabled = true;
-    currentEmbedding = null;
+    currentEmbeddingToken = null;
     showStatus('Recording cleared', 'info');
 }
 
@@ -178,7 +178,7 @@ async function handleRecordingComplete(stream) {
         console.log('Recording response:', response.status, result);
 
         if (response.ok) {
-            currentEmbedding = result.embedding;
+            currentEmbeddingToken = result.token;
             showStatus('✓ Voice recorded successfully! Click "Use This Recording" to continue.', 'success');
         } else {
             showStatus('Error: ' + result.error, 'error');
@@ -289,7 +289,7 @@ function drawWaveformFromAudioBuffer(audioBuffer) {
 
 
 function useRecording() {
-    if (currentEmbedding) {
+    if (currentEmbeddingToken) {
         showStatus('✓ Recording selected. Now write text to synthesize!', 'success');
         // Enable synthesis section
         synthesisSection.style.opacity = 1;
@@ -319,7 +319,7 @@ async function synthesizeText() {
         return;
     }
 
-    if (!currentEmbedding) {
+    if (!currentEmbeddingToken) {
         showStatus('Please record a voice sample first', 'error');
         return;
     }
@@ -330,7 +330,7 @@ async function synthesizeText() {
     try {
         const payload = {
             text: text,
-            embedding: currentEmbedding
+            embedding_token: currentEmbeddingToken
         };
         // Include playback speed (librosa rate). Default 1.0 (no change)
         if (speedSlider) {
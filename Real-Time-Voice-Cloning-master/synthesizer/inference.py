@@ -69,7 +69,7 @@ class Synthesizer:
 
     def synthesize_spectrograms(self, texts: List[str],
                                 embeddings: Union[np.ndarray, List[np.ndarray]],
-                                return_alignments=False):
+                                return_alignments=False, return_tensors=False):
         """
         Synthesizes mel spectrograms from texts and speaker embeddings.
 
@@ -78,6 +78,9 @@ class Synthesizer:
         :param return_alignments: if True, a matrix representing the alignments between the
         characters
         and each decoder output step will be returned for each spectrogram
+        :param return_tensors: if True, the spectrograms are returned as torch tensors left on the
+        synthesizer's device instead of numpy arrays, so they can be passed to the vocoder
+        without a round trip through the cpu
         :return: a list of N melspectrograms as numpy arrays of shape (80, Mi), where Mi is the
         sequence length of spectrogram i, and possibly the alignments.
         """
@@ -116,6 +119,13 @@ class Synthesizer:
 
             # Inference
             _, mels, alignments = self._model.generate(chars, speaker_embeddings)
+            if return_tensors:
+                for m in mels.detach():
+                    # Trim silence from end of each spectrogram, keeping it on the device
+                    voiced = torch.nonzero(m.max(dim=0).values >= hparams.tts_stop_threshold)
+                    specs.append(m[:, :voiced[-1].item() + 1] if len(voiced) else m)
+                continue
+
             mels = mels.detach().cpu().numpy()
             for m in mels:
                 # Trim silence from end of each spectrogram
@@ -0,0 +1,105 @@
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure the repository root is on sys.path for imports like `import app`
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+
+def make_wav(samples, sr=16000, channels=1, format_tag=1, bits=16, extra_chunks=b""):
+    data = samples.astype("<i2").tobytes()
+    fmt = struct.pack("<HHIIHH", format_tag, channels, sr, sr * channels * bits // 8,
+                      channels * bits // 8, bits)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra_chunks
+    body += b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_pcm16_mono_round_trip():
+    wav = np.linspace(-0.99, 0.99, 1001, dtype=np.float32)
+    encoded = bytes(app.write_pcm16_wav(wav, 16000))
+    assert len(encoded) == 44 + 2 * len(wav)
+
+    decoded, sr = app.read_pcm16_wav(encoded)
+    assert sr == 16000
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, wav, atol=1e-4)
+
+
+def test_pcm16_write_rounds_to_nearest():
+    lsb = 1 / 32767
+    wav = np.array([0.95 * lsb, -0.95 * lsb, 0.4 * lsb, 1.0, -1.0], dtype=np.float32)
+    encoded = bytes(app.write_pcm16_wav(wav, 16000))
+    samples = np.frombuffer(encoded, dtype="<i2", offset=44)
+    np.testing.assert_array_equal(samples, [1, -1, 0, 32767, -32767])
+
+
+def test_pcm16_stereo_is_downmixed():
+    left = np.array([1000, 2000, -3000], dtype=np.int16)
+    right = np.array([3000, 0, -1000], dtype=np.int16)
+    interleaved = np.stack([left, right], axis=1).reshape(-1)
+    decoded, sr = app.read_pcm16_wav(make_wav(interleaved, sr=22050, channels=2))
+    assert sr == 22050
+    np.testing.assert_allclose(decoded, np.array([2000, 1000, -2000]) / 32768, atol=1e-7)
+
+
+def test_odd_sized_chunk_is_skipped():
+    # Chunks of odd size are followed by a pad byte
+    samples = np.array([1, -2, 3, -4], dtype=np.int16)
+    extra = b"LIST" + struct.pack("<I", 3) + b"abc" + b"\x00"
+    decoded, _ = app.read_pcm16_wav(make_wav(samples, extra_chunks=extra))
+    np.testing.assert_allclose(decoded, samples / 32768)
+
+
+def test_non_pcm16_returns_none():
+    samples = np.zeros(4, dtype=np.int16)
+    assert app.read_pcm16_wav(make_wav(samples, format_tag=3)) is None
+    assert app.read_pcm16_wav(make_wav(samples, bits=24)) is None
+    assert app.read_pcm16_wav(b"OggS" + bytes(40)) is None
+    assert app.read_pcm16_wav(b"") is None
+
+
+def test_truncated_fmt_chunk_returns_none():
+    encoded = make_wav(np.zeros(4, dtype=np.int16))
+    assert app.read_pcm16_wav(encoded[:24]) is None
+
+
+def test_peak_normalize():
+    wav = np.array([0.25, -0.5, 0.1], dtype=np.float32)
+    normalized = app.peak_normalize(wav)
+    assert normalized.dtype == np.float32
+    np.testing.assert_allclose(normalized, [0.495, -0.99, 0.198], rtol=1e-6)
+
+    normalized = app.peak_normalize(np.array([0.25, -0.5, 0.1], dtype=np.float64), 1.0)
+    assert normalized.dtype == np.float32
+    np.testing.assert_allclose(normalized, [0.5, -1.0, 0.2], rtol=1e-6)
+
+    silence = app.peak_normalize(np.zeros(3, dtype=np.float32))
+    np.testing.assert_array_equal(silence, np.zeros(3))
+
+
+def test_embedding_cache(monkeypatch):
+    embed = np.random.rand(app.speaker_embedding_size)
+    token = app.store_embedding(embed)
+    cached = app.fetch_embedding(token)
+    assert cached.dtype == np.float32
+    np.testing.assert_allclose(cached, embed, rtol=1e-6)
+    assert app.fetch_embedding("unknown") is None
+
+    monkeypatch.setattr(app, "EMBED_CACHE_TTL", -1)
+    expired = app.store_embedding(embed)
+    assert app.fetch_embedding(expired) is None
+
+
+@pytest.mark.parametrize("token", [["abc"], {"token": "abc"}, 123])
+def test_synthesize_rejects_non_string_token(token):
+    response = app.app.test_client().post("/api/synthesize", json={"text": "Hello.", "embedding_token": token})
+    assert response.status_code == 400
+    assert "token" in response.get_json()["error"]
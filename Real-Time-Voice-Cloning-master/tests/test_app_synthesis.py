@@ -0,0 +1,91 @@
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+# Ensure the repository root is on sys.path for imports like `import app`
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from synthesizer.hparams import hparams  # noqa: E402
+from synthesizer.inference import Synthesizer  # noqa: E402
+from synthesizer.models.tacotron import Tacotron  # noqa: E402
+from synthesizer.utils.symbols import symbols  # noqa: E402
+from vocoder import hparams as voc_hp  # noqa: E402
+from vocoder import inference as vocoder  # noqa: E402
+from vocoder.models.fatchord_version import WaveRNN  # noqa: E402
+
+
+@pytest.fixture
+def small_models(monkeypatch):
+    """Installs small randomly initialized models in place of the pretrained ones."""
+    torch.manual_seed(0)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    tacotron = Tacotron(embed_dims=32, num_chars=len(symbols), encoder_dims=32, decoder_dims=32,
+                        n_mels=hparams.num_mels, fft_bins=hparams.num_mels, postnet_dims=32,
+                        encoder_K=3, lstm_dims=32, postnet_K=3, num_highways=1, dropout=0.5,
+                        stop_threshold=hparams.tts_stop_threshold,
+                        speaker_embedding_size=hparams.speaker_embedding_size).to(device)
+    tacotron.eval()
+    # Keep the untrained model from predicting the end of the utterance after a few frames, and
+    # cap the output length instead, so the spectrogram outlasts the vocoder's fade-out
+    with torch.no_grad():
+        tacotron.decoder.stop_proj.bias.fill_(-1e3)
+    tacotron.generate = partial(tacotron.generate, steps=100)
+    synthesizer = Synthesizer(Path("unused.pt"), verbose=False)
+    synthesizer._model = tacotron
+    monkeypatch.setattr(app, "synthesizer_model", synthesizer)
+
+    wavernn = WaveRNN(rnn_dims=32, fc_dims=32, bits=voc_hp.bits, pad=voc_hp.voc_pad,
+                      upsample_factors=voc_hp.voc_upsample_factors, feat_dims=voc_hp.num_mels,
+                      compute_dims=16, res_out_dims=16, res_blocks=1,
+                      hop_length=voc_hp.hop_length, sample_rate=voc_hp.sample_rate,
+                      mode=voc_hp.voc_mode).to(device)
+    wavernn.eval()
+    monkeypatch.setattr(vocoder, "_model", wavernn)
+    monkeypatch.setattr(vocoder, "_device", device, raising=False)
+
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_synthesize_wav_file(small_models, traced):
+    if traced:
+        vocoder.trace_model()
+
+    embed = np.random.RandomState(0).rand(app.speaker_embedding_size).astype(np.float32)
+    embed /= np.linalg.norm(embed)
+    audio_bytes = app._inference_pool.submit(app.synthesize_wav_file, "Hello world.", embed).result()
+
+    wav, sr = app.read_pcm16_wav(audio_bytes.getvalue())
+    assert sr == app.synthesizer_model.sample_rate
+    assert len(wav) > int(0.1 * sr)
+    assert np.abs(wav).max() <= 1.0
+
+
+def test_failed_warmup_fails_load(monkeypatch):
+    def broken_vocode(spec):
+        raise RuntimeError("vocoder broken")
+
+    monkeypatch.setattr(app, "ensure_default_models", lambda models_dir: None)
+    monkeypatch.setattr(app.encoder, "load_model", lambda weights_fpath: None)
+    monkeypatch.setattr(app.encoder, "embed_utterance", lambda wav: np.zeros(256, dtype=np.float32))
+    monkeypatch.setattr(Synthesizer, "load", lambda self: None)
+    monkeypatch.setattr(Synthesizer, "synthesize_spectrograms",
+                        lambda self, texts, embeddings: [np.zeros((hparams.num_mels, 50))])
+    monkeypatch.setattr(app.vocoder, "load_model", lambda weights_fpath, verbose: None)
+    monkeypatch.setattr(app, "vocode", broken_vocode)
+    monkeypatch.setattr(app, "encoder_model", None)
+    monkeypatch.setattr(app, "synthesizer_model", None)
+    monkeypatch.setattr(app, "vocoder_model", None)
+    monkeypatch.setitem(app.app.config, "VOCODER_JIT", False)
+
+    with pytest.raises(RuntimeError, match="vocoder broken"):
+        app.load_models()
+    response = app.app.test_client().get("/api/health")
+    assert response.get_json()["models_loaded"] is False
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+import torch
+
+# Ensure the repository root is on sys.path for imports like `import encoder`
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from encoder import audio  # noqa: E402
+from encoder import inference as encoder  # noqa: E402
+from encoder.model import SpeakerEncoder  # noqa: E402
+
+
+def test_blockwise_embedding_matches_whole_spectrogram(monkeypatch):
+    torch.manual_seed(0)
+    device = torch.device("cpu")
+    model = SpeakerEncoder(device, device)
+    model.eval()
+    monkeypatch.setattr(encoder, "_model", model)
+    monkeypatch.setattr(encoder, "_device", device, raising=False)
+
+    rng = np.random.RandomState(0)
+    wav = rng.uniform(-0.5, 0.5, encoder.sampling_rate * 8).astype(np.float32)
+    partials_batch_size = 3
+
+    # Reference: embed the partials sliced from the spectrogram of the whole utterance
+    wave_slices, mel_slices = encoder.compute_partial_slices(len(wav))
+    assert len(mel_slices) > 2 * partials_batch_size
+    padded = np.pad(wav, (0, max(wave_slices[-1].stop - len(wav), 0)), "constant")
+    frames = audio.wav_to_mel_spectrogram(padded)
+    expected_partials = encoder.embed_frames_batch(np.array([frames[s] for s in mel_slices]))
+    raw_embed = np.mean(expected_partials, axis=0)
+    expected = raw_embed / np.linalg.norm(raw_embed, 2)
+
+    embed, partial_embeds, slices = encoder.embed_utterance(
+        wav, return_partials=True, partials_batch_size=partials_batch_size)
+
+    assert slices == wave_slices
+    np.testing.assert_allclose(partial_embeds, expected_partials, atol=1e-6)
+    np.testing.assert_allclose(embed, expected, atol=1e-6)
@@ -42,12 +42,43 @@ def is_loaded():
     return _model is not None
 
 
+def quantize_model():
+    """
+    Converts the linear layers of the loaded model to dynamically quantized int8 layers, for
+    faster inference on cpu at the cost of a slight drop in quality. The GRU layers are kept in
+    float since WaveRNN.generate() builds GRU cells from their weights. Cpu only.
+    """
+    global _model
+    if _model is None:
+        raise Exception("Please load Wave-RNN in memory before using it")
+
+    _model = torch.quantization.quantize_dynamic(_model, {torch.nn.Linear}, dtype=torch.qint8,
+                                                 inplace=True)
+
+
+def trace_model():
+    """
+    Replaces the upsampling network of the loaded model with a TorchScript trace of it, which
+    removes the Python dispatch of its convolution layers. The autoregressive sampling loop of
+    WaveRNN.generate() is left as is.
+    """
+    if _model is None:
+        raise Exception("Please load Wave-RNN in memory before using it")
+
+    _model.eval()
+    example_mel = torch.zeros(1, hp.num_mels, 10 + 2 * hp.voc_pad, device=_device)
+    with torch.no_grad():
+        _model.upsample = torch.jit.trace(_model.upsample, example_mel)
+
+
 def infer_waveform(mel, normalize=True,  batched=True, target=8000, overlap=800, 
                    progress_callback=None):
     """
     Infers the waveform of a mel spectrogram output by the synthesizer (the format must match 
     that of the synthesizer!)
     
+    :param mel: the mel spectrogram, either as a numpy array or as a torch tensor (which may
+    already be on the vocoder's device)
     :param normalize:  
     :param batched: 
     :param target: 
@@ -59,6 +90,9 @@ def infer_waveform(mel, normalize=True,  batched=True, target=8000, overlap=800,
     
     if normalize:
         mel = mel / hp.mel_max_abs_value
-    mel = torch.from_numpy(mel[None, ...])
+    if torch.is_tensor(mel):
+        mel = mel[None, ...]
+    else:
+        mel = torch.from_numpy(mel[None, ...])
     wav = _model.generate(mel, batched, target, overlap, hp.mu_law, progress_callback)
     return wav
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for serving the web app in production with gunicorn:
+
+    gunicorn wsgi:app
+
+Settings are read from gunicorn.conf.py. Unlike `python app.py`, the models are loaded when
+this module is imported, i.e. when the gunicorn worker starts.
+"""
+
+from app import app, load_models
+
+__all__ = ["app"]
+
+load_models()